@@ -1,79 +1,222 @@
 from PySide6.QtGui import QTextCharFormat, QTextCursor, QColor, QAction
 from PySide6.QtWidgets import QMenu
-from PySide6.QtCore import Qt, QTimer, QThread, Signal
+from PySide6.QtCore import Qt, QTimer, QThread, QCoreApplication, Signal
 from spellchecker import SpellChecker
 import re
+import bisect
+import functools
+import queue
 
 # --- Engine Setup ---
 spell = SpellChecker(distance=2)  # Increased for better recognition
 ignored_words = set()
+USER_DICT = set()  # Lowercase words added with "Add to Dictionary"
 
 # Add common contractions and patterns that shouldn't be flagged
-spell.word_frequency.load_words(['dont', 'wont', 'cant', 'shouldnt', 'wouldnt', 'couldnt', 
-                                  'isnt', 'arent', 'wasnt', 'werent', 'hasnt', 'havent',
-                                  'hadnt', 'doesnt', 'didnt', 'thats', 'whats', 'heres',
-                                  'theres', 'youre', 'theyre', 'were', 'ive', 'youve',
-                                  'weve', 'theyve', 'id', 'youd', 'hed', 'shed', 'itll',
-                                  'thatll', 'ill', 'youll', 'shell', 'theyll'])
+CONTRACTIONS = frozenset(['dont', 'wont', 'cant', 'shouldnt', 'wouldnt', 'couldnt', 
+                          'isnt', 'arent', 'wasnt', 'werent', 'hasnt', 'havent',
+                          'hadnt', 'doesnt', 'didnt', 'thats', 'whats', 'heres',
+                          'theres', 'youre', 'theyre', 'were', 'ive', 'youve',
+                          'weve', 'theyve', 'id', 'youd', 'hed', 'shed', 'itll',
+                          'thatll', 'ill', 'youll', 'shell', 'theyll'])
+# Straight into the frequency Counter (so they still show up as suggestions),
+# skipping load_words() and its full dictionary statistics rebuild
+spell.word_frequency.dictionary.update({w: 1 for w in CONTRACTIONS})
+
+# Known lowercase words, checked with a plain hash lookup instead of spell.unknown()
+KNOWN = frozenset(spell.word_frequency.dictionary.keys()) | CONTRACTIONS
+
+# Only match actual alphabetic words (no numbers or mixed): a word is an ASCII-letter
+# run not touching other word characters, like r"\b[a-zA-Z]+\b"
+
+# ASCII translation table: lowercases letters, keeps digits and "_" (word characters,
+# so "abc123" stays one token that isn't a word) and blanks everything else
+_WORD_TABLE = bytes(
+    c + 32 if 65 <= c <= 90 else c if 97 <= c <= 122 or 48 <= c <= 57 or c == 95 else 32
+    for c in range(256)
+)
+
+# Prefilter for the rare non-ASCII characters, swapped 1:1 for an ASCII stand-in
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+def _ascii_stand_in(m):
+    # Non-ASCII letters/digits are word characters ("_"), everything else separates
+    return "_" if m.group().isalnum() else " "
+
+# Characters that end a sentence/line; incremental checks re-scan whole sentences
+_TOKEN_RE = re.compile(r"\S+")
+_WINDOW_BREAKS = ".!?\n"
+
+def _map_position(pos, edit_pos, removed, added):
+    """Map a position in the old text through a single contentsChange edit"""
+    if pos <= edit_pos:
+        return pos
+    if pos >= edit_pos + removed:
+        return pos + added - removed
+    return edit_pos + added
+
+def _replay_edits(errors, edits):
+    """Shift cached error spans through the edits.
+
+    Returns the untouched errors, the (start, end) spans whose formatting may now be
+    stale (remnants of edited errors and inserted text, which inherits the format on
+    its left), and the dirty range.
+    """
+    touched = []
+    lo = hi = None
+    for pos, removed, added in edits:
+        delta = added - removed
+        end = pos + removed
+        touched = [(_map_position(s, pos, removed, added), _map_position(e, pos, removed, added))
+                   for s, e in touched]
+        # Spans overlapping the edited text become touched, later ones move with the text
+        touched.extend((_map_position(s, pos, removed, added), _map_position(e, pos, removed, added))
+                       for s, e, w in errors if e > pos and s < end)
+        errors = [(s, e, w) if e <= pos else (s + delta, e + delta, w)
+                  for s, e, w in errors if e <= pos or s >= end]
+        if added:
+            touched.append((pos, pos + added))
+        if lo is None:
+            lo, hi = pos, pos + added
+        else:
+            lo = min(_map_position(lo, pos, removed, added), pos)
+            hi = max(_map_position(hi, pos, removed, added), pos + added)
+    return errors, [(s, e) for s, e in touched if s < e], lo, hi
+
+def _sentence_window(text, lo, hi):
+    """Expand [lo, hi) outward to the surrounding sentence boundaries"""
+    start = max(text.rfind(c, 0, lo) for c in _WINDOW_BREAKS) + 1
+    ends = [i for i in (text.find(c, hi) for c in _WINDOW_BREAKS) if i != -1]
+    return start, min(ends) if ends else len(text)
 
 class SpellCheckWorker(QThread):
-    results_ready = Signal(list, str)  # errors + text hash for validation
+    """One long-lived checker thread fed through a queue; stale requests are skipped"""
+    results_ready = Signal(list, object, int, int)  # errors + change (see check()) + document revision + request id
 
-    def __init__(self, text):
+    def __init__(self):
         super().__init__()
-        self.text = text
+        self._queue = queue.Queue()
+
+    def submit(self, request_id, text, revision, cached_errors=None, edits=()):
+        """Queue a check; cached_errors=None checks the whole document"""
+        self._queue.put((request_id, text, revision, cached_errors, edits))
+
+    def stop(self):
+        self._queue.put(None)
+        self.wait()
+
+    def _superseded(self):
+        # A newer request is waiting, so whatever we're doing is already stale
+        return not self._queue.empty()
 
     def run(self):
-        # Only match actual alphabetic words (no numbers or mixed)
-        word_regex = re.compile(r"\b[a-zA-Z]+\b")
-        matches = list(word_regex.finditer(self.text))
-        
-        # Build set of (lowercase_word, original_case_word) pairs
-        word_map = {}
-        for m in matches:
-            original = m.group()
-            lower = original.lower()
-            if lower not in ignored_words:
-                if lower not in word_map:
-                    word_map[lower] = []
-                word_map[lower].append((m.start(), m.end(), original))
-        
-        # Check lowercase versions
-        misspelled = spell.unknown(word_map.keys())
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if self._superseded():
+                continue
+            request_id, text, revision, cached_errors, edits = job
+            result = self.check(text, cached_errors, edits)
+            if result is not None:
+                self.results_ready.emit(result[0], result[1], revision, request_id)
+
+    def check(self, text, cached_errors, edits):
+        """Return (errors, change), or None if a newer request arrived meanwhile.
+
+        change is None when nothing was re-checked, else (lo, hi, previous, touched):
+        the re-checked window, the old error spans inside it, and the spans whose
+        formatting may be stale.
+        """
+        n = len(text)
+        if cached_errors is None:
+            # Formatting anywhere may be stale
+            retained, previous, touched = [], [], [(0, n)]
+            lo, hi = 0, n
+        else:
+            retained, touched, lo, hi = _replay_edits(cached_errors, edits)
+            if lo is None:
+                # Nothing was edited, the cached errors are still valid
+                return retained, None
+            lo, hi = _sentence_window(text, min(lo, n), min(hi, n))
+            touched = [(s, min(e, n)) for s, e in touched if s < n]
+            previous = [(s, e) for s, e, w in retained if e > lo and s < hi]
+            retained = [err for err in retained if err[1] <= lo or err[0] >= hi]
+
+        # Map lowercase words to their (start, end) spans in the dirty window only
+        window = text[lo:hi]
+        if not window.isascii():
+            # Same length, so offsets still match the document
+            window = _NON_ASCII_RE.sub(_ascii_stand_in, window)
+
+        # Tokenize in C: translate() lowercases and blanks separators, split() cuts
+        # the tokens, and the set keeps each distinct one once
+        data = window.encode("ascii").translate(_WORD_TABLE).decode("ascii")
+        words = {w for w in set(data.split()) if w.isalpha()}
+        if self._superseded():
+            return None
         
-        # Map back to original positions
-        errors = []
-        for lower_word in misspelled:
-            for start, end, original in word_map[lower_word]:
-                errors.append((start, end, original))
+        # Check lowercase versions with C-level set differences
+        misspelled = words.difference(KNOWN, USER_DICT, ignored_words)
         
-        # Send text hash to verify it hasn't changed
-        self.results_ready.emit(errors, str(hash(self.text)))
+        # One pass over the tokens recovers the offsets of the misspelled ones
+        errors = retained
+        if misspelled:
+            for count, m in enumerate(_TOKEN_RE.finditer(data)):
+                if count & 0xFFF == 0 and self._superseded():
+                    return None
+                if m.group() in misspelled:
+                    start, end = m.span()
+                    errors.append((lo + start, lo + end, text[lo + start:lo + end]))
+        errors.sort()
+        return errors, (lo, hi, previous, touched)
 
 _worker_ref = None
-_last_text_hash = None
+_request_id = 0  # Id of the newest check, results of older ones are dropped
+_cached_errors = None  # Errors of the last applied check, None forces a full check
+_pending_edits = []  # (position, removed, added) edits since _cached_errors was computed
+
+def _record_edit(editor, position, removed, added):
+    _pending_edits.append((position, removed, added))
+    editor._spellcheck_timer.start()
 
 def highlight_misspelled_words(editor):
-    global _worker_ref, _last_text_hash
+    global _request_id
     
     current_text = editor.toPlainText()
-    current_hash = str(hash(current_text))
+    current_rev = editor.document().revision()
     
-    # If a worker is already running, stop it
-    if _worker_ref and _worker_ref.isRunning():
-        _worker_ref.terminate()
-        _worker_ref.wait()
-
-    _last_text_hash = current_hash
-    _worker_ref = SpellCheckWorker(current_text)
-    _worker_ref.results_ready.connect(lambda errs, h: apply_highlights(editor, errs, h))
-    _worker_ref.start(QThread.LowPriority)
+    # A check still queued or running notices the newer request and bails out
+    _request_id += 1
+    _worker_ref.submit(_request_id, current_text, current_rev, _cached_errors, list(_pending_edits))
 
-def apply_highlights(editor, errors, text_hash):
-    global _last_text_hash
+def apply_highlights(editor, errors, change, rev, request_id):
+    global _cached_errors
     
-    # Only apply if text hasn't changed since we started checking
-    if text_hash != _last_text_hash or not editor:
+    # Only apply the newest check, and only if text hasn't changed since it started
+    if not editor or request_id != _request_id or rev != editor.document().revision():
+        return
+
+    _cached_errors = errors
+    _pending_edits.clear()
+    if change is None:
+        return  # Nothing was re-checked, the underlines on screen are current
+    lo, hi, previous, touched = change
+
+    # Errors are sorted by start, so the window's ones are a contiguous slice
+    first = bisect.bisect_left(errors, (lo,))
+    new = set()
+    for start, end, word in errors[first:]:
+        if start >= hi:
+            break
+        new.add((start, end))
+
+    # Only re-format what differs from the underlines already on screen, plus the
+    # spans whose text was edited (their old or inherited underline may be wrong)
+    old = set(previous)
+    reset = (old - new).union(touched)
+    paint = (new - old).union(span for span in new if any(span[0] < e and s < span[1] for s, e in touched))
+    if not reset and not paint:
         return
     
     doc = editor.document()
@@ -86,22 +229,31 @@ def apply_highlights(editor, errors, text_hash):
     
     # Create a separate cursor for formatting
     format_cursor = QTextCursor(doc)
+
+    # Batch every format change into one edit block, and keep it away from _record_edit
+    doc.blockSignals(True)
+    format_cursor.beginEditBlock()
     
-    # 1. Reset all formatting
-    format_cursor.select(QTextCursor.Document)
+    # 1. Reset formatting where an underline is gone or may be stale
     default_fmt = QTextCharFormat()
-    format_cursor.setCharFormat(default_fmt)
+    for start, end in reset:
+        format_cursor.setPosition(start)
+        format_cursor.setPosition(end, QTextCursor.KeepAnchor)
+        format_cursor.setCharFormat(default_fmt)
 
     # 2. Apply red underline (less intrusive than background)
     error_fmt = QTextCharFormat()
     error_fmt.setUnderlineStyle(QTextCharFormat.WaveUnderline)
     error_fmt.setUnderlineColor(QColor(255, 0, 0))
 
-    # 3. Apply to all misspellings
-    for start, end, word in errors:
+    # 3. Apply to the new misspellings and the ones whose text was edited
+    for start, end in paint:
         format_cursor.setPosition(start)
         format_cursor.setPosition(end, QTextCursor.KeepAnchor)
         format_cursor.setCharFormat(error_fmt)
+
+    format_cursor.endEditBlock()
+    doc.blockSignals(False)
     
     # 4. Restore original cursor position and selection
     if has_selection:
@@ -112,37 +264,44 @@ def apply_highlights(editor, errors, text_hash):
     editor.setTextCursor(cursor)
 
 def enable_spellcheck(editor):
+    global _worker_ref
+    _worker_ref = SpellCheckWorker()
+    _worker_ref.results_ready.connect(lambda errs, change, rev, rid: apply_highlights(editor, errs, change, rev, rid))
+    _worker_ref.start(QThread.LowPriority)
+    QCoreApplication.instance().aboutToQuit.connect(_worker_ref.stop)
+    
     editor.setContextMenuPolicy(Qt.CustomContextMenu)
     editor.customContextMenuRequested.connect(lambda pos: show_spellcheck_menu(editor, pos))
     
     timer = QTimer()
     timer.setSingleShot(True)
-    timer.setInterval(700) 
+    timer.setInterval(150)  # Checks only cover the edited sentences now
     timer.timeout.connect(lambda: highlight_misspelled_words(editor))
     
     editor._spellcheck_timer = timer
-    editor.textChanged.connect(timer.start)
+    editor.document().contentsChange.connect(lambda pos, removed, added: _record_edit(editor, pos, removed, added))
     
     QTimer.singleShot(500, lambda: highlight_misspelled_words(editor))
 
+@functools.lru_cache(maxsize=1024)
+def _suggest(lower_word):
+    """Spelling suggestions for a lowercase word, memoized since candidates() is expensive"""
+    return tuple(spell.candidates(lower_word) or ())[:7]  # More suggestions
+
 def show_spellcheck_menu(editor, pos):
     cursor = editor.cursorForPosition(pos)
     cursor.select(QTextCursor.WordUnderCursor)
     word = cursor.selectedText()
-    
-    # Filter out non-alphabetic or ignored words
-    if not word or not word.isalpha() or word.lower() in ignored_words:
-        editor.createStandardContextMenu().exec(editor.mapToGlobal(pos))
-        return
-
-    # Check lowercase version
     lower_word = word.lower()
-    if lower_word not in spell.unknown([lower_word]):
+    
+    # Filter out non-alphabetic, correctly spelled or ignored words
+    if (not word or not word.isalpha() or lower_word in KNOWN
+            or lower_word in USER_DICT or lower_word in ignored_words):
         editor.createStandardContextMenu().exec(editor.mapToGlobal(pos))
         return
     
     # Get suggestions with better matching
-    suggs = list(spell.candidates(lower_word) or [])[:7]  # More suggestions
+    suggs = list(_suggest(lower_word))
     
     # If first letter was capitalized, capitalize suggestions
     if word and word[0].isupper():
@@ -182,11 +341,38 @@ def replace_word(editor, new_word, pos):
     cursor.insertText(new_word)
     QTimer.singleShot(100, lambda: highlight_misspelled_words(editor))
 
+def _forget_word(editor, lower):
+    """Stop flagging lower: un-underline its cached spans instead of re-checking the document"""
+    global _cached_errors, _request_id
+    if _cached_errors is None or _pending_edits:
+        # Cached spans don't match the document yet, fall back to a full check
+        _cached_errors = None
+        highlight_misspelled_words(editor)
+        return
+
+    # Nothing is pending, so an in-flight check could only hand back the old errors
+    _request_id += 1
+
+    spans = [err for err in _cached_errors if err[2].lower() == lower]
+    _cached_errors = [err for err in _cached_errors if err[2].lower() != lower]
+
+    doc = editor.document()
+    format_cursor = QTextCursor(doc)
+    default_fmt = QTextCharFormat()
+    doc.blockSignals(True)
+    format_cursor.beginEditBlock()
+    for start, end, word in spans:
+        format_cursor.setPosition(start)
+        format_cursor.setPosition(end, QTextCursor.KeepAnchor)
+        format_cursor.setCharFormat(default_fmt)
+    format_cursor.endEditBlock()
+    doc.blockSignals(False)
+
 def ignore_word(editor, word):
     ignored_words.add(word.lower())  # Store as lowercase
-    highlight_misspelled_words(editor)
+    _forget_word(editor, word.lower())
 
 def add_to_dictionary(editor, word):
-    """Permanently add word to spellchecker dictionary"""
-    spell.word_frequency.load_words([word.lower()])
-    highlight_misspelled_words(editor)
\ No newline at end of file
+    """Add word to the user dictionary for this session"""
+    USER_DICT.add(word.lower())
+    _forget_word(editor, word.lower())
@@ -1,17 +1,22 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                                QColorDialog, QLabel, QFrame, QFileDialog, QMessageBox)
 from PySide6.QtGui import QPixmap, QPainter, QPen, QColor, QImage, QPainterPath, QKeySequence, QShortcut
-from PySide6.QtCore import Qt, QPoint, QRect, QSize
+from PySide6.QtCore import Qt, QPoint, QRect, QSize, QTimer
+import bisect
 import os
 
 pad_size_width = 450
 pad_size_height = 400
+hit_grid_cell = 64  # Cell size of the canvas hit-test grid
 
 class ColorButton(QPushButton):
     """A button that displays a color"""
+    _STYLE_CACHE = {}  # color.rgb() -> stylesheet string
+    
     def __init__(self, color, callback=None):
         super().__init__()
         self.color = QColor(color)  # Make a copy of the color
+        self._style = None
         self.setFixedSize(30, 30)
         self.update_color(self.color)
         if callback:
@@ -19,7 +24,14 @@ class ColorButton(QPushButton):
     
     def update_color(self, color):
         self.color = QColor(color)
-        self.setStyleSheet(f"background-color: {color.name()}; border: 2px solid #555;")
+        style = ColorButton._STYLE_CACHE.get(color.rgb())
+        if style is None:
+            style = f"background-color: {color.name()}; border: 2px solid #555;"
+            ColorButton._STYLE_CACHE[color.rgb()] = style
+        # Setting a stylesheet re-parses CSS and repolishes, skip it when nothing changed
+        if style != self._style:
+            self._style = style
+            self.setStyleSheet(style)
 
 class ImageObject:
     """Represents an image on the canvas"""
@@ -30,26 +42,45 @@ class ImageObject:
         self.width = pixmap.width()
         self.height = pixmap.height()
         self.selected = False
+        self._scaled_cache = None
+        self._scaled_key = None
     
     def get_rect(self):
         return QRect(self.x, self.y, self.width, self.height)
     
     def contains_point(self, point):
-        return self.get_rect().contains(point)
+        px, py = point.x(), point.y()
+        return self.x <= px < self.x + self.width and self.y <= py < self.y + self.height
+    
+    def get_scaled(self):
+        """Return the pixmap scaled to the current size, rescaling only when the size changed"""
+        if self._scaled_key != (self.width, self.height):
+            # Scale maintaining aspect ratio and transparency
+            self._scaled_cache = self.pixmap.scaled(
+                self.width, self.height,
+                Qt.KeepAspectRatio,
+                Qt.SmoothTransformation
+            )
+            self._scaled_key = (self.width, self.height)
+        return self._scaled_cache
     
     def move(self, dx, dy):
+        # Size is unchanged, so the cached scaled pixmap stays valid
         self.x += dx
         self.y += dy
     
     def resize(self, new_width, new_height):
         self.width = max(20, new_width)
         self.height = max(20, new_height)
+        self._scaled_key = None
 
-class DrawingCanvas(QLabel):
+class DrawingCanvas(QWidget):
     """Canvas widget for drawing and managing images"""
     def __init__(self, width=pad_size_width, height=pad_size_height):
         super().__init__()
         self.setFixedSize(width, height)
+        # paintEvent fills every damaged pixel itself
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
         self.canvas_width = width
         self.canvas_height = height
         
@@ -59,21 +90,31 @@ class DrawingCanvas(QLabel):
         self.pen_width = 3
         self.eraser_mode = False
         self.has_drawn = False
+        self._stroke_painter = None  # Open on the drawing layer for the current stroke
+        self._stroke_width = 0
+        self._update_pending = False
+        self._damage = QRect()  # Area dirtied by mouse moves since the last flush
         
         # Mode: 'draw' or 'select'
         self.mode = 'draw'
         
         # Image management
-        self.images = []  # List of ImageObject instances
+        self._z = {}  # ImageObject -> z value (higher = closer to the top)
+        self._z_top = 0
+        self._z_bottom = 0
+        self._z_order = None  # Cached bottom-to-top image list, rebuilt on z changes
+        self._z_keys = None  # z values matching _z_order, for bisecting
+        self._grid = None  # (cell_x, cell_y) -> images overlapping that cell, bottom to top
         self.selected_image = None
         self.dragging_image = False
         self.resizing_image = False
         self.drag_start_pos = None
         self.resize_corner = None
         
-        # Drawing layer (transparent with premultiplied alpha)
-        self.drawing_layer = QPixmap(width, height)
-        self.drawing_layer.fill(Qt.transparent)
+        # Drawing layer (transparent with premultiplied alpha, Qt's fast blending format)
+        layer = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+        layer.fill(Qt.transparent)
+        self.drawing_layer = QPixmap.fromImage(layer)
         
         self.update_canvas()
     
@@ -83,11 +124,7 @@ class DrawingCanvas(QLabel):
             
             if self.mode == 'select':
                 # Select mode - interact with images
-                clicked_image = None
-                for img in reversed(self.images):  # Check from top to bottom
-                    if img.contains_point(pos):
-                        clicked_image = img
-                        break
+                clicked_image = self.image_at(pos)
                 
                 # Deselect all images first
                 for img in self.images:
@@ -119,6 +156,7 @@ class DrawingCanvas(QLabel):
                 # Always draw, ignore images
                 self.drawing = True
                 self.last_point = pos
+                self.begin_stroke()
     
     def mouseMoveEvent(self, event):
         pos = event.pos()
@@ -127,9 +165,11 @@ class DrawingCanvas(QLabel):
             # Move the image
             dx = pos.x() - self.drag_start_pos.x()
             dy = pos.y() - self.drag_start_pos.y()
+            old_rect = self.selected_image.get_rect()
             self.selected_image.move(dx, dy)
+            self._grid = None
             self.drag_start_pos = pos
-            self.update_canvas()
+            self.update_image_area(old_rect, self.selected_image)
             self.has_drawn = True
         
         elif self.resizing_image and self.selected_image and self.drag_start_pos:
@@ -138,59 +178,127 @@ class DrawingCanvas(QLabel):
             dy = pos.y() - self.drag_start_pos.y()
             new_width = self.selected_image.width + dx
             new_height = self.selected_image.height + dy
+            old_rect = self.selected_image.get_rect()
             self.selected_image.resize(new_width, new_height)
+            self._grid = None
             self.drag_start_pos = pos
-            self.update_canvas()
+            self.update_image_area(old_rect, self.selected_image)
             self.has_drawn = True
         
-        elif self.drawing and event.buttons() & Qt.LeftButton:
+        elif self.drawing and self._stroke_painter and event.buttons() & Qt.LeftButton:
             # Draw on the drawing layer
-            painter = QPainter(self.drawing_layer)
-            if self.eraser_mode:
-                painter.setCompositionMode(QPainter.CompositionMode_Clear)
-                painter.setPen(QPen(Qt.transparent, 15, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
-            else:
-                painter.setPen(QPen(self.current_color, self.pen_width, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
-            
-            painter.drawLine(self.last_point, pos)
-            painter.end()
+            self._stroke_painter.drawLine(self.last_point, pos)
+            # Only repaint the bounding box of the new segment
+            width = self._stroke_width
+            self.schedule_update(QRect(self.last_point, pos).normalized().adjusted(-width, -width, width, width))
             self.last_point = pos
-            self.update_canvas()
             self.has_drawn = True
     
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton:
+            self.end_stroke()
             self.drawing = False
             self.dragging_image = False
             self.resizing_image = False
             self.drag_start_pos = None
     
+    @property
+    def images(self):
+        """ImageObjects from bottom to top layer"""
+        if self._z_order is None:
+            self._z_order = sorted(self._z, key=self._z.__getitem__)
+            self._z_keys = [self._z[img] for img in self._z_order]
+        return self._z_order
+    
+    def _layer_index(self, img):
+        """Position of img in the bottom-to-top order, found by bisecting the z values"""
+        self.images  # Make sure the cached order is built
+        return bisect.bisect_left(self._z_keys, self._z[img])
+    
+    def image_at(self, pos):
+        """Topmost image under pos, looking only at the images in pos's grid cell"""
+        if self._grid is None:
+            self._grid = {}
+            for img in self.images:
+                for cx in range(img.x // hit_grid_cell, (img.x + img.width - 1) // hit_grid_cell + 1):
+                    for cy in range(img.y // hit_grid_cell, (img.y + img.height - 1) // hit_grid_cell + 1):
+                        self._grid.setdefault((cx, cy), []).append(img)
+        
+        px, py = pos.x(), pos.y()
+        for img in reversed(self._grid.get((px // hit_grid_cell, py // hit_grid_cell), ())):  # Check from top to bottom
+            if img.x <= px < img.x + img.width and img.y <= py < img.y + img.height:
+                return img
+        return None
+    
+    def _swap_layers(self, i, j):
+        """Swap two neighbouring layers; each position keeps its z value, so the cache stays sorted"""
+        a, b = self._z_order[i], self._z_order[j]
+        self._z[a], self._z[b] = self._z[b], self._z[a]
+        self._z_order[i], self._z_order[j] = b, a
+        self._grid = None
+    
+    def begin_stroke(self):
+        """Open one painter on the drawing layer, configured once for the whole stroke"""
+        self.end_stroke()
+        painter = QPainter(self.drawing_layer)
+        if self.eraser_mode:
+            self._stroke_width = 15
+            painter.setCompositionMode(QPainter.CompositionMode_Clear)
+            painter.setPen(QPen(Qt.transparent, self._stroke_width, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+        else:
+            self._stroke_width = self.pen_width
+            painter.setPen(QPen(self.current_color, self._stroke_width, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+        self._stroke_painter = painter
+    
+    def end_stroke(self):
+        """Finish the current stroke's painter, if any"""
+        if self._stroke_painter:
+            self._stroke_painter.end()
+            self._stroke_painter = None
+    
     def update_canvas(self):
-        """Redraw the entire canvas with images and drawing layer"""
-        final_pixmap = QPixmap(self.canvas_width, self.canvas_height)
-        final_pixmap.fill(Qt.white)
-        
-        painter = QPainter(final_pixmap)
+        """Schedule a repaint of the entire canvas"""
+        self.update()
+    
+    def update_image_area(self, old_rect, img):
+        """Schedule a repaint of an image's old and new area, including its selection outline"""
+        self.schedule_update(old_rect.united(img.get_rect()).adjusted(-2, -2, 2, 2))
+    
+    def schedule_update(self, rect):
+        """Collect damage from a burst of mouse moves and flush it once per event loop pass"""
+        self._damage = self._damage.united(rect)
+        if not self._update_pending:
+            self._update_pending = True
+            QTimer.singleShot(0, self._flush_update)
+    
+    def _flush_update(self):
+        self._update_pending = False
+        self.update(self._damage)
+        self._damage = QRect()
+    
+    def paintEvent(self, event):
+        """Redraw the damaged part of the canvas with images and drawing layer"""
+        rect = event.rect()
+        painter = QPainter(self)
+        painter.setClipRect(rect)
+        painter.fillRect(rect, Qt.white)
         painter.setRenderHint(QPainter.Antialiasing, True)
         painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
         
         corner_size = 10
         
-        # Draw all images with proper transparency
+        # Draw the images touching the damaged area with proper transparency
         for img in self.images:
-            # Scale maintaining aspect ratio and transparency
-            scaled_pixmap = img.pixmap.scaled(
-                img.width, img.height,
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
+            if not img.get_rect().adjusted(-2, -2, 2, 2).intersects(rect):
+                continue
             
             # Draw image (transparency is automatically handled)
-            painter.drawPixmap(img.x, img.y, scaled_pixmap)
+            painter.drawPixmap(img.x, img.y, img.get_scaled())
             
             # Draw selection rectangle
             if img.selected:
                 painter.setPen(QPen(QColor(0, 120, 215), 2, Qt.DashLine))
+                painter.setBrush(Qt.NoBrush)
                 painter.drawRect(img.get_rect())
                 
                 # Draw resize handle (bottom-right corner)
@@ -202,11 +310,9 @@ class DrawingCanvas(QLabel):
                     corner_size, corner_size
                 )
         
-        # Draw the drawing layer on top
-        painter.drawPixmap(0, 0, self.drawing_layer)
+        # Draw the matching part of the drawing layer on top
+        painter.drawPixmap(rect, self.drawing_layer, rect)
         painter.end()
-        
-        self.setPixmap(final_pixmap)
     
     def add_image(self, filepath):
         """Add an image to the canvas with full transparency support"""
@@ -215,12 +321,11 @@ class DrawingCanvas(QLabel):
         if pixmap.isNull():
             return False
         
-        # Check if image has alpha channel and preserve it
-        if pixmap.hasAlpha():
-            # Image has transparency - convert to format that preserves it
-            img = pixmap.toImage()
-            img = img.convertToFormat(QImage.Format_ARGB32_Premultiplied)
-            pixmap = QPixmap.fromImage(img)
+        # Convert to premultiplied ARGB: preserves any alpha channel, and opaque
+        # images then composite through the same fast path as the drawing layer
+        img = pixmap.toImage()
+        img = img.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+        pixmap = QPixmap.fromImage(img)
         
         # Scale down if too large (preserve aspect ratio and transparency)
         max_size = 200
@@ -236,15 +341,23 @@ class DrawingCanvas(QLabel):
         y = (self.canvas_height - pixmap.height()) // 2
         
         img_obj = ImageObject(pixmap, x, y)
-        self.images.append(img_obj)
+        self._z_top += 1
+        self._z[img_obj] = self._z_top
+        if self._z_order is not None:
+            # New images go on top, so the cached order stays sorted
+            self._z_order.append(img_obj)
+            self._z_keys.append(self._z_top)
+        self._grid = None
         self.update_canvas()
         self.has_drawn = True
         return True
     
     def delete_selected_image(self):
         """Delete the currently selected image"""
-        if self.selected_image and self.selected_image in self.images:
-            self.images.remove(self.selected_image)
+        if self.selected_image and self.selected_image in self._z:
+            self._z.pop(self.selected_image)
+            self._z_order = None
+            self._grid = None
             self.selected_image = None
             self.update_canvas()
             return True
@@ -252,38 +365,42 @@ class DrawingCanvas(QLabel):
     
     def bring_to_front(self):
         """Bring selected image to front (top layer)"""
-        if self.selected_image and self.selected_image in self.images:
-            self.images.remove(self.selected_image)
-            self.images.append(self.selected_image)  # Add to end = top layer
+        if self.selected_image and self.selected_image in self._z:
+            self._z_top += 1
+            self._z[self.selected_image] = self._z_top
+            self._z_order = None
+            self._grid = None
             self.update_canvas()
             return True
         return False
     
     def send_to_back(self):
         """Send selected image to back (bottom layer)"""
-        if self.selected_image and self.selected_image in self.images:
-            self.images.remove(self.selected_image)
-            self.images.insert(0, self.selected_image)  # Add to start = bottom layer
+        if self.selected_image and self.selected_image in self._z:
+            self._z_bottom -= 1
+            self._z[self.selected_image] = self._z_bottom
+            self._z_order = None
+            self._grid = None
             self.update_canvas()
             return True
         return False
     
     def bring_forward(self):
         """Bring selected image one layer forward"""
-        if self.selected_image and self.selected_image in self.images:
-            index = self.images.index(self.selected_image)
-            if index < len(self.images) - 1:  # Not already at top
-                self.images[index], self.images[index + 1] = self.images[index + 1], self.images[index]
+        if self.selected_image and self.selected_image in self._z:
+            index = self._layer_index(self.selected_image)
+            if index < len(self._z_order) - 1:  # Not already at top
+                self._swap_layers(index, index + 1)
                 self.update_canvas()
                 return True
         return False
     
     def send_backward(self):
         """Send selected image one layer backward"""
-        if self.selected_image and self.selected_image in self.images:
-            index = self.images.index(self.selected_image)
+        if self.selected_image and self.selected_image in self._z:
+            index = self._layer_index(self.selected_image)
             if index > 0:  # Not already at bottom
-                self.images[index], self.images[index - 1] = self.images[index - 1], self.images[index]
+                self._swap_layers(index, index - 1)
                 self.update_canvas()
                 return True
         return False
@@ -307,7 +424,11 @@ class DrawingCanvas(QLabel):
     
     def clear_canvas(self):
         """Clear everything - images and drawings"""
-        self.images.clear()
+        self.end_stroke()
+        self._z.clear()
+        self._z_top = self._z_bottom = 0
+        self._z_order = None
+        self._grid = None
         self.selected_image = None
         self.drawing_layer.fill(Qt.transparent)
         self.update_canvas()
@@ -324,12 +445,7 @@ class DrawingCanvas(QLabel):
         
         # Draw all images without selection indicators (transparency preserved)
         for img in self.images:
-            scaled_pixmap = img.pixmap.scaled(
-                img.width, img.height,
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-            painter.drawPixmap(img.x, img.y, scaled_pixmap)
+            painter.drawPixmap(img.x, img.y, img.get_scaled())
         
         # Draw the drawing layer
         painter.drawPixmap(0, 0, self.drawing_layer)
@@ -342,6 +458,7 @@ class DrawingPad(QWidget):
     def __init__(self):
         super().__init__()
         self.recent_colors = []
+        self.recent_color_buttons = []
         self.max_recent_colors = 5
         self.draw_mode_btn = None
         self.select_mode_btn = None
@@ -497,16 +614,20 @@ class DrawingPad(QWidget):
         self.update_recent_colors_ui()
     
     def update_recent_colors_ui(self):
-        # Clear existing buttons
-        while self.recent_colors_layout.count():
-            item = self.recent_colors_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
-        # Add color buttons with callback
-        for color in self.recent_colors:
-            btn = ColorButton(color, self.select_recent_color)
-            self.recent_colors_layout.addWidget(btn)
+        # Recolor the existing buttons, only creating the ones that are missing
+        for i, color in enumerate(self.recent_colors):
+            if i < len(self.recent_color_buttons):
+                self.recent_color_buttons[i].update_color(color)
+            else:
+                btn = ColorButton(color, self.select_recent_color)
+                self.recent_colors_layout.addWidget(btn)
+                self.recent_color_buttons.append(btn)
+        
+        # Drop buttons for colors that are no longer in the list
+        while len(self.recent_color_buttons) > len(self.recent_colors):
+            btn = self.recent_color_buttons.pop()
+            self.recent_colors_layout.removeWidget(btn)
+            btn.deleteLater()
     
     def select_recent_color(self, color):
         """Select a color from recent colors"""
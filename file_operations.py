@@ -1,5 +1,134 @@
 from PySide6.QtWidgets import QFileDialog, QMessageBox
 import os
+import errno
+import mmap
+import shutil
+import hashlib
+import tempfile
+
+DIRECT_WRITE_THRESHOLD = 4 * 1024 * 1024  # Notes at least this big bypass the page cache
+DIRECT_CHUNK = 1024 * 1024  # Multiple of the page size, so every direct write stays aligned
+
+# The umask can only be read by setting it, so do that once at import, before any
+# background threads exist that could create files while it's briefly 0
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# (digest, size, mtime_ns) of what we last wrote to each path, to skip rewriting
+# unchanged text as long as nobody else has touched the file since
+_saved_digests = {}
+
+def _file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+# Skip per-entry icon lookups and symlink resolution, which stat every file (slow on network mounts)
+DIALOG_OPTIONS = QFileDialog.Option.DontUseCustomDirectoryIcons | QFileDialog.Option.DontResolveSymlinks
+
+def _write_buffered(path, data):
+    with open(path, "wb", buffering=1 << 20) as f:
+        f.write(data)
+
+def _write_direct(fd, data):
+    """Write bytes to an O_DIRECT fd in aligned chunks, then trim the tail padding."""
+    # Writes must be whole logical blocks; give up on odd block sizes
+    block = max(os.fstatvfs(fd).f_bsize, mmap.PAGESIZE)
+    if DIRECT_CHUNK % block:
+        raise OSError(errno.EINVAL, "unsupported block size for direct write")
+
+    # O_DIRECT needs an aligned buffer; anonymous mmap memory is page aligned
+    buf = mmap.mmap(-1, DIRECT_CHUNK)
+    try:
+        view = memoryview(data)
+        with memoryview(buf) as out:
+            for offset in range(0, len(data), DIRECT_CHUNK):
+                chunk = view[offset:offset + DIRECT_CHUNK]
+                size = len(chunk)
+                buf[:size] = chunk
+                # Pad the tail to a whole block; it's truncated away below
+                padded = -(-size // block) * block
+                if padded > size:
+                    buf[size:padded] = b" " * (padded - size)
+                # os.write may write less than asked; keep going until the chunk is out
+                done = 0
+                while done < padded:
+                    done += os.write(fd, out[done:padded])
+    finally:
+        buf.close()
+    os.ftruncate(fd, len(data))
+
+def _write_large(path, data):
+    """Write bytes to path, using an unbuffered direct write for big payloads."""
+    direct = getattr(os, "O_DIRECT", 0)
+    if len(data) < DIRECT_WRITE_THRESHOLD or not direct:
+        _write_buffered(path, data)
+        return
+
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | direct, 0o666)
+    except OSError:
+        # Filesystem doesn't support O_DIRECT (tmpfs, some network mounts)
+        _write_buffered(path, data)
+        return
+
+    try:
+        _write_direct(fd, data)
+        rejected = False
+    except OSError as e:
+        # Some filesystems accept O_DIRECT at open but refuse the writes
+        if e.errno != errno.EINVAL:
+            raise
+        rejected = True
+    finally:
+        os.close(fd)
+    if rejected:
+        _write_buffered(path, data)
+
+def _save_atomic(path, data):
+    """Replace the file at path with data without ever leaving it half written."""
+    # Write through symlinks to the real note so the link itself survives
+    target = os.path.realpath(path)
+    try:
+        st = os.stat(target)
+    except FileNotFoundError:
+        st = None
+
+    if st is not None and st.st_nlink > 1:
+        # A rename would split the note off from its other hard links
+        _write_large(target, data)
+        return
+
+    # Write next to the target and swap it in, so a crash mid-write never
+    # leaves a truncated note behind (no fsync; the OS flushes it)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix="." + os.path.basename(target) + ".", suffix=".tmp", dir=os.path.dirname(target)
+    )
+    os.close(fd)
+    try:
+        _write_large(tmp_path, data)
+        if st is not None:
+            # Keep the note's permissions (a private 0600 note stays private) and owner
+            shutil.copymode(target, tmp_path)
+            tmp_st = os.stat(tmp_path)
+            if (st.st_uid, st.st_gid) != (tmp_st.st_uid, tmp_st.st_gid):
+                try:
+                    os.chown(tmp_path, st.st_uid, st.st_gid)
+                except OSError:
+                    pass
+        else:
+            # mkstemp creates 0600; new notes get the same mode open() would give them
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, target)
+    except BaseException:
+        # Only ever clean up the temp file we created
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
 
 def new_file(editor, parent, current_file, drawing_pad=None):
     """Clear the editor to start a new file, prompting to save if needed."""
@@ -39,10 +168,16 @@ def open_file(editor, parent, current_file, drawing_pad=None):
         elif reply == QMessageBox.StandardButton.Cancel:
             return current_file  # Cancel opening
     
-    file_path, _ = QFileDialog.getOpenFileName(parent, "Open File", "", "Text Files (*.txt);;All Files (*)")
+    file_path, _ = QFileDialog.getOpenFileName(
+        parent, "Open File", "", "Text Files (*.txt);;All Files (*)", options=DIALOG_OPTIONS
+    )
     if file_path:
-        with open(file_path, "r", encoding="utf-8") as f:
-            editor.setPlainText(f.read())
+        # Read the raw bytes in one go and decode once, instead of refilling
+        # the default 8 KiB text buffer over and over
+        with open(file_path, "rb", buffering=1 << 20) as f:
+            data = f.read()
+        # Binary mode skips universal newlines, so normalize them like text mode did
+        editor.setPlainText(data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n"))
         
         # Clear drawing when opening a new text file
         if drawing_pad:
@@ -57,7 +192,10 @@ def save_file(editor, parent, current_file=None, drawing_pad=None):
 
     # Always ask for folder if no current file yet
     if not current_file:
-        folder_path = QFileDialog.getExistingDirectory(parent, "Select or Create Folder to Save Project")
+        folder_path = QFileDialog.getExistingDirectory(
+            parent, "Select or Create Folder to Save Project",
+            options=QFileDialog.Option.ShowDirsOnly | DIALOG_OPTIONS
+        )
         if not folder_path:
             return None  # User canceled
 
@@ -66,7 +204,8 @@ def save_file(editor, parent, current_file=None, drawing_pad=None):
             parent,
             "Name Your File",
             folder_path,
-            "Text Files (*.txt)"
+            "Text Files (*.txt)",
+            options=DIALOG_OPTIONS
         )
         if not project_name:
             return None  # User canceled
@@ -78,8 +217,15 @@ def save_file(editor, parent, current_file=None, drawing_pad=None):
         current_file = project_name
 
     # Save text file
-    with open(current_file, "w", encoding="utf-8") as f:
-        f.write(editor.toPlainText())
+    # Encode once and hand the bytes straight to the buffered writer
+    payload = editor.toPlainText().encode("utf-8")
+    digest = hashlib.blake2b(payload, digest_size=8).digest()
+    stamp = _file_stamp(current_file)
+    if stamp is None or _saved_digests.get(current_file) != (digest,) + stamp:
+        _save_atomic(current_file, payload)
+        stamp = _file_stamp(current_file)
+        if stamp is not None:
+            _saved_digests[current_file] = (digest,) + stamp
     editor.document().setModified(False)
 
     # Save drawing if present
@@ -17,18 +17,18 @@ from PySide6.QtWidgets import (
     QFileDialog, QMessageBox, QProgressBar, QLabel, QSlider, QDialog, QPushButton, QLineEdit,
     QCheckBox, QWidgetAction
 )
-from PySide6.QtGui import QFont, QFontDatabase, QKeySequence, QShortcut, QIcon, QAction
-from PySide6.QtCore import Qt, QTimer, QSettings
+from PySide6.QtGui import QFont, QFontDatabase, QKeySequence, QShortcut, QIcon, QAction, QTextCursor
+from PySide6.QtCore import Qt, QTimer, QSettings, QThread
 
 import file_operations
 import view_operations
 import preferences_operations
-import ai_operations
-import voice_operations
 import drawing_operations
-import summarization_operations
 from splash import SplashScreen
 
+# ai_operations, voice_operations and summarization_operations pull in the spell
+# dictionary, faster-whisper, numpy and openai, so they're imported where first used
+
 # -----------------------------
 # PyInstaller-safe resource path
 # -----------------------------
@@ -82,6 +82,7 @@ class OpenAISettingsDialog(QDialog):
             QMessageBox.warning(self, "Invalid Key", "Groq API keys must start with gsk_")
             return
         self.settings.setValue("api_key", token)
+        import summarization_operations
         summarization_operations.set_api_token(token)
         QMessageBox.information(self, "Saved", "API key saved")
         self.accept()
@@ -92,6 +93,7 @@ class OpenAISettingsDialog(QDialog):
 class MicSensitivityDialog(QDialog):
     def __init__(self, parent=None, current_value=50):
         super().__init__(parent)
+        import voice_operations
         self.setWindowTitle("Microphone Sensitivity")
         self.resize(400, 200)
 
@@ -125,6 +127,10 @@ class MicSensitivityDialog(QDialog):
         self.optimal_label.setStyleSheet("color: #4CAF50; font-weight: bold;")
         layout.addWidget(self.optimal_label)
 
+        self.accuracy_check = QCheckBox("Accuracy Mode (slower transcription, longer phrases)")
+        self.accuracy_check.toggled.connect(voice_operations.set_accuracy_mode)
+        layout.addWidget(self.accuracy_check)
+
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(self.close)
         layout.addWidget(close_btn)
@@ -132,6 +138,23 @@ class MicSensitivityDialog(QDialog):
     def update_level(self, level):
         self.level_bar.setValue(level)
 
+# -----------------------------
+# Whisper Preloader
+# -----------------------------
+class WhisperLoader(QThread):
+    """Imports voice_operations and warms up the Whisper model off the GUI thread"""
+
+    def run(self):
+        # faster-whisper, CTranslate2, av, numpy and speech_recognition all load here
+        import voice_operations
+        if not voice_operations.WHISPER_AVAILABLE:
+            return
+        try:
+            voice_operations._get_model()
+        except Exception as e:
+            # VoiceWorker retries the load and reports the error when dictation starts
+            print(f"Whisper preload failed: {e}")
+
 # -----------------------------
 # Dyslexia Fonts
 # -----------------------------
@@ -177,10 +200,6 @@ def init_main():
     layout.addWidget(drawing_pad)
     window.setCentralWidget(central)
 
-    # Auto-load API key
-    if settings.value("api_key"):
-        summarization_operations.set_api_token(settings.value("api_key"))
-
     # Theme
     preferences_operations.apply_theme(editor, settings.value("theme", "Light"))
 
@@ -275,6 +294,7 @@ def init_main():
     ai_menu.addAction(voice_action)
 
     def toggle_voice_ui():
+        import voice_operations
         def level_cb(l):
             if mic_dialog[0] and mic_dialog[0].isVisible(): mic_dialog[0].update_level(l)
         # Convert 0-100 sensitivity to 4000-100 range (INVERTED - higher % = more sensitive)
@@ -297,17 +317,64 @@ def init_main():
     mic_action.triggered.connect(lambda: (mic_dialog.__setitem__(0, MicSensitivityDialog(window, current_sensitivity[0])) or mic_dialog[0].show()) if not mic_dialog[0] else mic_dialog[0].show())
     ai_menu.addAction(mic_action)
 
+    # Warm up Whisper once the user reaches for the mic UI, so only people who
+    # dictate pay for the (first-run: downloaded) model and only they wait on quit
+    whisper_loader = WhisperLoader(window)
+    QApplication.instance().aboutToQuit.connect(whisper_loader.wait)
+    def start_whisper_preload():
+        if not whisper_loader.isRunning() and not whisper_loader.isFinished():
+            whisper_loader.start(QThread.LowPriority)
+    voice_action.hovered.connect(start_whisper_preload)
+    mic_action.hovered.connect(start_whisper_preload)
+
     summarize_action = QAction("AI Teacher Explain", window)
+    summarize_worker = [None]
     def summarize_text_trigger():
+        if not summarize_action.isEnabled(): return  # A request is already in flight
         text = editor.toPlainText()
         if not text.strip(): return QMessageBox.information(window, "No Text", "Please provide content!")
+        import summarization_operations
+        # Auto-load the saved API key on first use
+        if summarization_operations.get_summarizer().client is None and settings.value("api_key"):
+            summarization_operations.set_api_token(settings.value("api_key"))
         window.setWindowTitle("SharkPad — Teacher thinking...")
-        QApplication.processEvents()
-        summary = summarization_operations.summarize_text(text, max_sentences=5)
-        editor.setPlainText(summary)
-        window.setWindowTitle("SharkPad")
-        QMessageBox.information(window, "AI Teacher", "Explanation complete!")
+        summarize_action.setEnabled(False)
+        # The explanation replaces the text, so don't let the user type into it meanwhile
+        editor.setReadOnly(True)
+
+        def on_summary(summary):
+            editor.setReadOnly(False)
+            window.setWindowTitle("SharkPad")
+            summarize_action.setEnabled(True)
+            if editor.toPlainText() != text:
+                # Dictation still edits a read-only editor; keep that text and just show the answer
+                QMessageBox.information(window, "AI Teacher", summary)
+                return
+            # Replace through a cursor so the original text stays one undo step away
+            cursor = editor.textCursor()
+            cursor.beginEditBlock()
+            cursor.select(QTextCursor.Document)
+            cursor.insertText(summary)
+            cursor.endEditBlock()
+            editor.setTextCursor(cursor)
+            QMessageBox.information(window, "AI Teacher", "Explanation complete!")
+
+        def on_finished():
+            summarize_worker[0].deleteLater()
+            summarize_worker[0] = None
+
+        # Keep the request off the GUI thread so typing and drawing stay responsive
+        summarize_worker[0] = summarization_operations.SummarizerWorker(text, max_sentences=5)
+        summarize_worker[0].result_ready.connect(on_summary)
+        summarize_worker[0].finished.connect(on_finished)
+        summarize_worker[0].start()
     summarize_action.triggered.connect(summarize_text_trigger)
+
+    # Don't tear down a request in flight on quit; the httpx timeout bounds the wait
+    def wait_for_summary():
+        if summarize_worker[0] is not None:
+            summarize_worker[0].wait()
+    QApplication.instance().aboutToQuit.connect(wait_for_summary)
     ai_menu.addAction(summarize_action)
 
     # ---------------- Shortcuts ----------------
@@ -319,8 +386,13 @@ def init_main():
     QShortcut(QKeySequence("Ctrl+Shift+D"), window, lambda: drawing_pad.set_mode('draw'))
     QShortcut(QKeySequence("Ctrl+Shift+E"), window, drawing_pad.canvas.set_eraser)
 
-    ai_operations.enable_spellcheck(editor)
     window.show()
+
+    # Load the dictionary once the window is up
+    def start_spellcheck():
+        import ai_operations
+        ai_operations.enable_spellcheck(editor)
+    QTimer.singleShot(0, start_spellcheck)
     
     return window
 
@@ -334,7 +406,6 @@ if __name__ == '__main__':
     splash.show_splash()
 
     def boot():
-        ai_operations.spell.unknown(["shark"])
         window = init_main()
         QTimer.singleShot(800, splash.close)
 
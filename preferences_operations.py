@@ -1,18 +1,32 @@
 from PySide6.QtGui import QPalette, QColor
 from PySide6.QtWidgets import QPlainTextEdit
 
+# Background and text colors for each supported theme, built once
+_THEMES = {
+    "Light": (QColor("white"), QColor("black")),
+    "Dark": (QColor("#2b2b2b"), QColor("#f8f8f2")),
+    "Solarized": (QColor("#fdf6e3"), QColor("#657b83")),
+}
+
 def apply_theme(editor: QPlainTextEdit, theme: str):
     """
     Apply a theme/color scheme to the editor.
     Themes supported: "Light", "Dark", "Solarized"
     """
+    # Re-applying the same colors would still re-polish the editor
+    if getattr(editor, "_sharkpad_theme", None) == theme:
+        return
+    editor._sharkpad_theme = theme
+
+    # Palette changes skip the style sheet parse and cascade entirely
+    if editor.styleSheet():
+        editor.setStyleSheet("")
+    colors = _THEMES.get(theme)
+    if colors is None:
+        editor.setPalette(QPalette())  # Reset to default
+        return
+    bg, fg = colors
     palette = editor.palette()
-    
-    if theme == "Light":
-        editor.setStyleSheet("background-color: white; color: black;")
-    elif theme == "Dark":
-        editor.setStyleSheet("background-color: #2b2b2b; color: #f8f8f2;")
-    elif theme == "Solarized":
-        editor.setStyleSheet("background-color: #fdf6e3; color: #657b83;")
-    else:
-        editor.setStyleSheet("")  # Reset to default
+    palette.setColor(QPalette.Base, bg)
+    palette.setColor(QPalette.Text, fg)
+    editor.setPalette(palette)
@@ -2,22 +2,27 @@
 from PySide6.QtWidgets import QSplashScreen, QApplication
 from PySide6.QtGui import QPixmap, QPainter, QFont, QColor
 from PySide6.QtCore import Qt
+import functools
+
+@functools.lru_cache(maxsize=4)
+def _build_pixmap(width, height, message, bg_color, text_color):
+    """Render the splash pixmap once per size/message/colors (needs a QApplication)"""
+    # Create a pixmap with the background color
+    pixmap = QPixmap(width, height)
+    pixmap.fill(QColor(bg_color))
+
+    # Draw the text on the pixmap
+    painter = QPainter(pixmap)
+    painter.setPen(QColor(text_color))
+    painter.setFont(QFont("Arial", 32, QFont.Bold))
+    painter.drawText(pixmap.rect(), Qt.AlignCenter, message)
+    painter.end()
+    return pixmap
 
 class SplashScreen(QSplashScreen):
     def __init__(self, width=900, height=600, message="SharkPad is loading...", bg_color="#1E1E1E", text_color="white"):
-        # Create a pixmap with the background color
-        pixmap = QPixmap(width, height)
-        pixmap.fill(QColor(bg_color))
-        
-        # Draw the text on the pixmap
-        painter = QPainter(pixmap)
-        painter.setPen(QColor(text_color))
-        painter.setFont(QFont("Arial", 32, QFont.Bold))
-        painter.drawText(pixmap.rect(), Qt.AlignCenter, message)
-        painter.end()
-        
-        # Initialize QSplashScreen with the pixmap
-        super().__init__(pixmap)
+        # Initialize QSplashScreen with the (cached) pixmap
+        super().__init__(_build_pixmap(width, height, message, bg_color, text_color))
         
         # Center on screen
         screen_geometry = QApplication.primaryScreen().geometry()
@@ -1,4 +1,19 @@
+import httpx
 from openai import OpenAI
+from PySide6.QtCore import QThread, Signal
+
+# One pooled HTTP client shared by every OpenAI client, so a new key or a new
+# request reuses the open TLS connection to Groq instead of handshaking again
+_http_client = None
+
+def get_http_client():
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            limits=httpx.Limits(max_keepalive_connections=4),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+    return _http_client
 
 class FreeTeacherSummarizer:
     def __init__(self):
@@ -17,7 +32,8 @@ class FreeTeacherSummarizer:
 
         self.client = OpenAI(
             api_key=token,
-            base_url="https://api.groq.com/openai/v1"
+            base_url="https://api.groq.com/openai/v1",
+            http_client=get_http_client()
         )
         return True
 
@@ -74,3 +90,15 @@ def set_api_token(token):
 
 def summarize_text(text, **kwargs):
     return get_summarizer().summarize(text, **kwargs)
+
+class SummarizerWorker(QThread):
+    """Runs one summarize_text request off the GUI thread"""
+    result_ready = Signal(str)
+
+    def __init__(self, text, **kwargs):
+        super().__init__()
+        self.text = text
+        self.kwargs = kwargs
+
+    def run(self):
+        self.result_ready.emit(summarize_text(self.text, **self.kwargs))
@@ -5,10 +5,11 @@
 
 import os
 import sys
-import platform
+import math
+import threading
 import warnings
 import numpy as np
-from PySide6.QtCore import QThread, Signal
+from PySide6.QtCore import QThread, QTimer, Signal
 
 warnings.filterwarnings("ignore")
 
@@ -34,6 +35,43 @@ except ImportError:
     WHISPER_AVAILABLE = False
     print("ERROR: faster-whisper not installed. Run: pip install faster-whisper")
 
+def _rms(samples):
+    """RMS of int16 samples in a single int64 sum-of-squares pass"""
+    n = samples.size
+    return math.sqrt(np.einsum("i,i->", samples, samples, dtype=np.int64) / n) if n else 0.0
+
+# -----------------------------
+# Whisper Model Preloading
+# -----------------------------
+_preloaded_model = None
+_model_lock = threading.Lock()
+
+def _get_model():
+    """Return the shared Whisper model, loading it (or waiting for the loader) if needed"""
+    global _preloaded_model
+    with _model_lock:
+        if _preloaded_model is None:
+            # int8 runs on CTranslate2's quantized CPU kernels everywhere, Apple Silicon
+            # included; set SHARKPAD_WHISPER_COMPUTE=float32 to go back if it misbehaves
+            model_compute = os.environ.get("SHARKPAD_WHISPER_COMPUTE", "int8")
+            _preloaded_model = WhisperModel("base", device="cpu", compute_type=model_compute)
+        return _preloaded_model
+
+class _MeteredStream:
+    """Wraps the microphone stream so every chunk the recognizer reads also feeds the meter"""
+
+    def __init__(self, stream, on_chunk):
+        self._stream = stream
+        self._on_chunk = on_chunk
+
+    def read(self, size):
+        data = self._stream.read(size)
+        self._on_chunk(data)
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
 # -----------------------------
 # Voice Worker Thread
 # -----------------------------
@@ -45,12 +83,23 @@ class VoiceWorker(QThread):
     def __init__(self):
         super().__init__()
         self.energy_threshold = 600  # Default sensitivity
+        self.accuracy_mode = False  # Greedy decoding unless the user asks for beam search
         self.running = True
 
     def set_sensitivity(self, value):
         """Adjust microphone sensitivity (100-4000)"""
         self.energy_threshold = value
 
+    def set_accuracy_mode(self, enabled):
+        """Use 5-way beam search and longer phrases (slower, slightly more accurate)"""
+        self.accuracy_mode = enabled
+
+    def _emit_level(self, audio_data):
+        rms = _rms(np.frombuffer(audio_data, dtype=np.int16))
+        # Scale RMS relative to sensitivity for proper bar
+        level = min(100, max(0, int((rms / max(50, self.energy_threshold)) * 100)))
+        self.audio_level.emit(level)
+
     def run(self):
         if not WHISPER_AVAILABLE or sr is None:
             self.error_occurred.emit("Whisper or SpeechRecognition not installed")
@@ -59,10 +108,9 @@ class VoiceWorker(QThread):
         _stderr_orig = sys.stderr
         try:
             sys.stderr = sys.__stderr__
-            print("\n=== Loading Whisper Model ===")
-            model_device = "cpu"
-            model_compute = "float32" if platform.system() == "Darwin" else "int8"
-            model = WhisperModel("base", device=model_device, compute_type=model_compute)
+            if _preloaded_model is None:
+                print("\n=== Loading Whisper Model ===")
+            model = _get_model()
             print("Whisper model loaded successfully!\n")
             sys.stderr = open(os.devnull, "w")
 
@@ -73,42 +121,47 @@ class VoiceWorker(QThread):
             r.phrase_threshold = 0.3
             r.non_speaking_duration = 0.3
 
+            # Reused for every phrase handed to whisper (16 s at 16 kHz)
+            self._audio_buf = np.empty(16000 * 16, dtype=np.float32)
+
             mic = sr.Microphone(sample_rate=16000)
             with mic as source:
                 r.adjust_for_ambient_noise(source, duration=1)
+                # From here on the level meter taps the chunks listen() reads
+                source.stream = _MeteredStream(source.stream, self._emit_level)
                 print("Ready! Start speaking...")
 
                 while self.running:
                     try:
-                        # -------- Audio level meter (fixed) --------
-                        try:
-                            audio_data = source.stream.read(1024)
-                        except TypeError:
-                            # Fallback if exception_on_overflow not supported
-                            audio_data = source.stream.read(1024)
-                        
-                        audio_array = np.frombuffer(audio_data, dtype=np.int16)
-
-                        if audio_array.size == 0:
-                            rms = 0.0
-                        else:
-                            rms = np.sqrt(np.mean(audio_array.astype(np.float32)**2))
+                        # Listen for speech
+                        audio = r.listen(source, timeout=0.3, phrase_time_limit=15 if self.accuracy_mode else 5)
 
-                        # Scale RMS relative to sensitivity for proper bar
-                        level = min(100, max(0, int((rms / max(50, self.energy_threshold)) * 100)))
-                        self.audio_level.emit(level)
+                        raw = audio.get_raw_data()
+                        samples = np.frombuffer(raw, dtype=np.int16)
 
-                        # Listen for speech
-                        audio = r.listen(source, timeout=0.3, phrase_time_limit=15)
+                        # Skip whisper when no 1024-sample frame of the phrase is loud enough
+                        # (the listener hands back near-silence after ambient noise or a timeout)
+                        frames = samples[:samples.size - samples.size % 1024].reshape(-1, 1024)
+                        if frames.size:
+                            peak_ssq = np.einsum("ij,ij->i", frames, frames, dtype=np.int64).max()
+                            if math.sqrt(peak_ssq / 1024) < self.energy_threshold * 0.5:
+                                continue
 
                         # Convert to float32 numpy for faster-whisper
-                        raw = audio.get_raw_data()
-                        audio_float = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+                        n = samples.size
+                        if n > self._audio_buf.size:
+                            self._audio_buf = np.empty(n, dtype=np.float32)
+                        audio_float = self._audio_buf[:n]
+                        np.divide(samples, 32768.0, out=audio_float, casting="unsafe")
 
-                        # Transcribe
+                        # Transcribe (greedy decoding is ~5x cheaper and fine for dictation)
+                        if self.accuracy_mode:
+                            decode = dict(beam_size=5)
+                        else:
+                            decode = dict(beam_size=1, best_of=1, temperature=0.0, without_timestamps=True)
                         segments, _ = model.transcribe(
                             audio_float,
-                            beam_size=5,
+                            **decode,
                             language="en",
                             condition_on_previous_text=False,
                             vad_filter=True,
@@ -152,9 +205,38 @@ class VoiceWorker(QThread):
 # Global Voice Worker Reference
 # -----------------------------
 _voice_worker_ref = None
+_accuracy_mode = False
+
+# Transcribed phrases waiting to be inserted; flushed together so the editor
+# re-lays out once per burst instead of once per phrase
+_pending_text = []
+_voice_editor = None
+_flush_timer = None
+
+def _flush_voice_text():
+    if _pending_text and _voice_editor is not None:
+        # One edit block: a single contentsChange and a single undo step per flush
+        cursor = _voice_editor.textCursor()
+        cursor.beginEditBlock()
+        cursor.insertText(" ".join(_pending_text) + " ")
+        cursor.endEditBlock()
+        _voice_editor.setTextCursor(cursor)
+        _voice_editor.ensureCursorVisible()
+    _pending_text.clear()
+
+def _queue_voice_text(text):
+    global _flush_timer
+    if _flush_timer is None:
+        _flush_timer = QTimer()
+        _flush_timer.setSingleShot(True)
+        _flush_timer.setInterval(100)
+        _flush_timer.timeout.connect(_flush_voice_text)
+    _pending_text.append(text)
+    if not _flush_timer.isActive():
+        _flush_timer.start()
 
 def toggle_voice(editor, level_callback=None, sensitivity=600):
-    global _voice_worker_ref
+    global _voice_worker_ref, _voice_editor
     if _voice_worker_ref and _voice_worker_ref.isRunning():
         _voice_worker_ref.stop()
         _voice_worker_ref.wait(3000)  # Wait up to 3 seconds
@@ -163,12 +245,16 @@ def toggle_voice(editor, level_callback=None, sensitivity=600):
             _voice_worker_ref.wait(1000)
         _voice_worker_ref.deleteLater()  # Schedule for deletion
         _voice_worker_ref = None
+        _flush_voice_text()
         print("Voice recognition stopped.")
         return False
 
+    _flush_voice_text()  # Anything still queued belongs to the previous editor
+    _voice_editor = editor
     _voice_worker_ref = VoiceWorker()
     _voice_worker_ref.set_sensitivity(sensitivity)
-    _voice_worker_ref.text_received.connect(lambda t: editor.insertPlainText(t + " "))
+    _voice_worker_ref.set_accuracy_mode(_accuracy_mode)
+    _voice_worker_ref.text_received.connect(_queue_voice_text)
     _voice_worker_ref.error_occurred.connect(lambda e: print(f"Voice error: {e}"))
     if level_callback:
         _voice_worker_ref.audio_level.connect(level_callback)
@@ -180,6 +266,12 @@ def set_sensitivity(value):
     if _voice_worker_ref and _voice_worker_ref.isRunning():
         _voice_worker_ref.set_sensitivity(value)
 
+def set_accuracy_mode(enabled):
+    global _accuracy_mode
+    _accuracy_mode = enabled
+    if _voice_worker_ref and _voice_worker_ref.isRunning():
+        _voice_worker_ref.set_accuracy_mode(enabled)
+
 def is_voice_active():
     global _voice_worker_ref
     return _voice_worker_ref is not None and _voice_worker_ref.isRunning()
@@ -193,4 +285,5 @@ def stop_voice():
             _voice_worker_ref.terminate()
             _voice_worker_ref.wait(1000)
         _voice_worker_ref.deleteLater()
-        _voice_worker_ref = None
\ No newline at end of file
+        _voice_worker_ref = None
+        _flush_voice_text()
\ No newline at end of file